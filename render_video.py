@@ -97,13 +97,13 @@ def render_circular_video(model_path, iteration, views, gaussians, pipeline, bac
         torchvision.utils.save_image(rendering, os.path.join(render_path, '{0:05d}'.format(idx) + ".png"))
 
 
-def render_video(model_path, iteration, views, gaussians, pipeline, background):
+def render_video(model_path, iteration, views, gaussians, pipeline, background, soa=None):
     render_path = os.path.join(model_path, 'video', "ours_{}".format(iteration))
     makedirs(render_path, exist_ok=True)
     view = views[0]
     # render_path_spiral
     # render_path_spherical
-    for idx, pose in enumerate(tqdm(generate_ellipse_path(views, n_frames=600), desc="Rendering progress")):
+    for idx, pose in enumerate(tqdm(generate_ellipse_path(views, n_frames=600, soa=soa), desc="Rendering progress")):
         view.world_view_transform = torch.tensor(getWorld2View2(pose[:3, :3].T, pose[:3, 3], view.trans, view.scale)).transpose(0, 1).cuda()
         view.full_proj_transform = (view.world_view_transform.unsqueeze(0).bmm(view.projection_matrix.unsqueeze(0))).squeeze(0)
         view.camera_center = view.world_view_transform.inverse()[3, :3]
@@ -151,7 +151,7 @@ def render_sets(dataset: ModelParams, iteration: int, pipeline: PipelineParams,
         # Modify trajectory function in render_video's enumerate 
         if video:
             render_video(dataset.model_path, scene.loaded_iter, scene.getTrainCameras(),
-                         gaussians, pipeline, background)
+                         gaussians, pipeline, background, scene.getTrainCamerasSoA())
         # sample virtual view
         if args.gaussians:
             gaussian_render(dataset.model_path, scene.loaded_iter, scene.getTestCameras(),
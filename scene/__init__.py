@@ -17,6 +17,7 @@ from scene.dataset_readers import sceneLoadTypeCallbacks
 from scene.gaussian_model import GaussianModel
 from arguments import ModelParams
 from utils.camera_utils import cameraList_from_camInfos, camera_to_JSON
+from utils.pose_utils import views_to_soa
 
 
 class Scene:
@@ -50,6 +51,8 @@ class Scene:
 
         self.train_cameras = {}
         self.test_cameras = {}
+        self.train_cameras_soa = {}
+        self.test_cameras_soa = {}
         print(args.source_path)
         if os.path.exists(os.path.join(args.source_path, "sparse")):
             scene_info = sceneLoadTypeCallbacks["Colmap"](
@@ -99,6 +102,12 @@ class Scene:
             self.test_cameras[resolution_scale] = cameraList_from_camInfos(
                 scene_info.test_cameras, resolution_scale, args
             )
+            self.train_cameras_soa[resolution_scale] = views_to_soa(
+                self.train_cameras[resolution_scale]
+            )
+            self.test_cameras_soa[resolution_scale] = views_to_soa(
+                self.test_cameras[resolution_scale]
+            )
         if load_vq:
             self.gaussians.load_vq(self.model_path)
             
@@ -135,3 +144,9 @@ class Scene:
 
     def getTestCameras(self, scale=1.0):
         return self.test_cameras[scale]
+
+    def getTrainCamerasSoA(self, scale=1.0):
+        return self.train_cameras_soa[scale]
+
+    def getTestCamerasSoA(self, scale=1.0):
+        return self.test_cameras_soa[scale]
@@ -1,28 +1,142 @@
+import math
 import numpy as np
 import torch
-from icecream import ic
 from utils.graphics_utils import getWorld2View2
 
 
 def normalize(x):
-    return x / np.linalg.norm(x)
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
 
 
-def viewmatrix(z, up, pos):
+def _cross(a, b):
+    """Cross product of [..., 3] vectors, written out per component."""
+    a, b = np.asarray(a), np.asarray(b)
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    out[..., 0] = a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1]
+    out[..., 1] = a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2]
+    out[..., 2] = a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    return out
+
+
+def viewmatrix(z, up, pos, out=None):
+    """Build [..., 3, 4] camera-to-world matrices, batched over leading dims.
+
+    The columns are written into out when given, e.g. the [:, :3] slice of a pose buffer.
+    """
     vec2 = normalize(z)
     vec1_avg = up
-    vec0 = normalize(np.cross(vec1_avg, vec2))
-    vec1 = normalize(np.cross(vec2, vec0))
-    m = np.stack([vec0, vec1, vec2, pos], 1)
-    return m
+    vec0 = normalize(_cross(vec1_avg, vec2))
+    vec1 = normalize(_cross(vec2, vec0))
+    if out is None:
+        out = np.empty(np.broadcast_shapes(vec0.shape, np.shape(pos)) + (4,))
+    out[..., 0] = vec0
+    out[..., 1] = vec1
+    out[..., 2] = vec2
+    out[..., 3] = pos
+    return out
+
+
+def _inv33(m):
+    """Invert a 3x3 matrix in closed form via its adjugate and determinant."""
+    c00 = m[1, 1] * m[2, 2] - m[1, 2] * m[2, 1]
+    c01 = m[1, 2] * m[2, 0] - m[1, 0] * m[2, 2]
+    c02 = m[1, 0] * m[2, 1] - m[1, 1] * m[2, 0]
+    det = m[0, 0] * c00 + m[0, 1] * c01 + m[0, 2] * c02
+    # Fail like np.linalg.inv on degenerate input (e.g. all view axes parallel) instead of returning NaNs.
+    if not abs(det) > np.finfo(np.float64).eps * np.abs(m).max() ** 3:
+        raise np.linalg.LinAlgError("Singular matrix")
+    inv = np.empty((3, 3))
+    inv[0, 0] = c00
+    inv[1, 0] = c01
+    inv[2, 0] = c02
+    inv[0, 1] = m[0, 2] * m[2, 1] - m[0, 1] * m[2, 2]
+    inv[1, 1] = m[0, 0] * m[2, 2] - m[0, 2] * m[2, 0]
+    inv[2, 1] = m[0, 1] * m[2, 0] - m[0, 0] * m[2, 1]
+    inv[0, 2] = m[0, 1] * m[1, 2] - m[0, 2] * m[1, 1]
+    inv[1, 2] = m[0, 2] * m[1, 0] - m[0, 0] * m[1, 2]
+    inv[2, 2] = m[0, 0] * m[1, 1] - m[0, 1] * m[1, 0]
+    return inv / det
+
+
+def _rigid_inv(poses):
+    """Invert [..., 3 or 4, 4] rigid transforms [R | t] in closed form as [R^T | -R^T t]."""
+    rot_t = np.swapaxes(poses[..., :3, :3], -1, -2)
+    inv = np.zeros(poses.shape[:-2] + (4, 4))
+    inv[..., :3, :3] = rot_t
+    inv[..., :3, 3] = -(rot_t @ poses[..., :3, 3:4])[..., 0]
+    inv[..., 3, 3] = 1.0
+    return inv
+
+
+def _build_render_poses(c2w, up, rads, focal, thetas, zrate):
+    """Build the (N, 4, 4) world-to-camera poses of a spiral around c2w in one batch."""
+    t = np.stack([np.cos(thetas), -np.sin(thetas), -np.sin(thetas * zrate), np.ones_like(thetas)], -1)
+    c = (t * rads) @ c2w[:3, :4].T
+    # c2w @ [0, 0, -focal, 1] is loop-invariant and reduces to column arithmetic.
+    lookat = c2w[:3, 3] - focal * c2w[:3, 2]
+    render_poses = np.tile(np.eye(4), (len(thetas), 1, 1))
+    viewmatrix(c - lookat, up, c, out=render_poses[:, :3])
+    render_poses[:, :3, 1:3] *= -1
+    return _rigid_inv(render_poses)
+
+
+def _poses_from_soa(R, T):
+    """Camera-to-world poses with the y/z axes flipped, from (N, 3, 3) R and (N, 3) T arrays."""
+    # 世界坐标系到相机坐标系的变换为 [R^T | T]，其逆（相机坐标系到世界坐标系的变换）可直接写为 [R | -R T]
+    poses = np.empty((len(R), 4, 4))
+    poses[:, :3, :3] = R
+    poses[:, :3, 3] = -(R @ T[..., None])[..., 0]
+    poses[:, 3] = (0, 0, 0, 1)
+    # 对相机姿态沿着光轴进行镜像翻转（将旋转矩阵的第2列和第3列乘以-1）
+    poses[:, :, 1:3] *= -1
+    return poses
+
+
+def views_to_soa(views):
+    """Stack the R and T of every view into contiguous (N, 3, 3) and (N, 3) arrays."""
+    R_soa = np.empty((len(views), 3, 3))
+    T_soa = np.empty((len(views), 3))
+    for i, view in enumerate(views):
+        R_soa[i] = view.R
+        T_soa[i] = view.T
+    return R_soa, T_soa
+
+
+def _views_to_poses(views, soa=None):
+    """
+    Camera-to-world poses of views as an (N, 4, 4) array with the y/z axes flipped.
+    soa is the (R, T) pair built once per scene (Scene.getTrainCamerasSoA); without it
+    the arrays are gathered from the views on every call.
+    """
+    if soa is None:
+        soa = views_to_soa(views)
+    return _poses_from_soa(*soa)
+
+
+def _build_sphere_poses(c2w, up, rads, focal_range, thetas, phis):
+    """Build the (len(thetas) * len(phis), 4, 4) world-to-camera poses on a sphere around c2w, theta-major."""
+    theta, phi = np.meshgrid(thetas, phis, indexing='ij')
+    theta, phi = theta.ravel(), phi.ravel()
+    # Spherical coordinates for the camera centers.
+    t = np.stack([np.sin(phi) * np.cos(theta), np.sin(phi) * np.sin(theta), np.cos(phi), np.ones_like(phi)], -1)
+    c = (t * rads) @ c2w[:3, :4].T
+    # c2w @ [0, 0, -focal, 1] = center - focal * z_axis, with one focal per sample.
+    lookat = c2w[:3, 3] - focal_range[:len(theta), None] * c2w[:3, 2]
+    render_poses = np.tile(np.eye(4), (len(theta), 1, 1))
+    viewmatrix(c - lookat, up, c, out=render_poses[:, :3])
+    render_poses[:, :3, 1:3] *= -1
+    return _rigid_inv(render_poses)
 
 
 def poses_avg(poses):
     hwf = poses[0, :3, -1:]
 
-    center = poses[:, :3, 3].mean(0)
-    vec2 = normalize(poses[:, :3, 2].sum(0))
-    up = poses[:, :3, 1].sum(0)
+    # Reduce the up, z-axis and position columns in one pass; the sums used for the
+    # two directions only differ from their means by a positive scale.
+    means = poses[:, :3, 1:4].mean(0)
+    center = means[:, 2]
+    vec2 = normalize(means[:, 1])
+    up = means[:, 0]
     c2w = np.concatenate([viewmatrix(vec2, up, center), hwf], 1)
 
     return c2w
@@ -57,20 +171,25 @@ def integrate_weights_np(w):
   Returns:
     cw0: Tensor, the integral of w, where cw0[..., 0] = 0 and cw0[..., -1] = 1
   """
-    cw = np.minimum(1, np.cumsum(w[..., :-1], axis=-1))
-    shape = cw.shape[:-1] + (1,)
+    cw0 = np.empty(w.shape[:-1] + (w.shape[-1] + 1,))
+    cw = cw0[..., 1:-1]
+    np.cumsum(w[..., :-1], axis=-1, out=cw)
+    np.minimum(cw, 1, out=cw)
     # Ensure that the CDF starts with exactly 0 and ends with exactly 1.
-    cw0 = np.concatenate([np.zeros(shape), cw,
-                          np.ones(shape)], axis=-1)
+    cw0[..., 0] = 0
+    cw0[..., -1] = 1
     return cw0
 
 
 def invert_cdf_np(u, t, w_logits):
     """Invert the CDF defined by (t, w) at the points specified by u in [0, 1)."""
-    # Compute the PDF and CDF for each weight vector.
-    w = np.exp(w_logits) / np.exp(w_logits).sum(axis=-1, keepdims=True)
+    # Compute the PDF and CDF for each weight vector, exponentiating once and
+    # shifting by the max logit so the softmax cannot overflow.
+    w = np.exp(w_logits - w_logits.max(axis=-1, keepdims=True))
+    w /= w.sum(axis=-1, keepdims=True)
     cw = integrate_weights_np(w)
-    # Interpolate into the inverse CDF.
+    # Interpolate into the inverse CDF. u is sorted and cw is monotone, and np.interp
+    # seeds each bracket search with the previous hit, so this is already a linear merge.
     interp_fn = np.interp
     t_new = interp_fn(u, cw, t)
     return t_new
@@ -118,22 +237,25 @@ def focus_point_fn(poses):
     # 所以，当我们将世界坐标系转换到相机坐标系时，我们需要将世界坐标系的Z轴映射到相机坐标系的光轴方向，也就是-Z轴方向。
     # 因此，变换矩阵的第3列向量的方向就是相机的视轴方向。
     # 总结一下，相机位姿的变换矩阵中的第3列向量描述了相机的视轴方向，也就是相机坐标系中的负Z轴方向。
-    directions, origins = poses[:, :3, 2:3], poses[:, :3, 3:4]
-    m = np.eye(3) - directions * np.transpose(directions, [0, 2, 1])  # 计算变换矩阵
-    # 计算最近聚焦点，将变换矩阵 (m) 转置并与自身相乘，得到 (m^T \cdot m)。
+    directions, origins = poses[:, :3, 2], poses[:, :3, 3]
+    # 变换矩阵 m = I - d d^T，其转置与自身相乘可化简为 (m^T \cdot m) = I - (2 - |d|^2) d d^T，
+    # 因此无需显式构造 (N, 3, 3) 的 m 与 m^T \cdot m，只需每个位姿一个标量系数。
     # 然后，对所有位姿应用该矩阵，并计算每个位姿的原点在变换后的空间中的平均值。这样就得到了视轴最近的聚焦点。
     # 聚焦点是相机位姿中视轴所指向的最近点。在计算机图形学和计算机视觉中，聚焦点常用于渲染、虚拟相机控制、三维重建和姿态估计等任务中。
     # 该函数通过计算相机视轴的投影，找到了在所有视轴方向上最近的点，提供了有用的信息用于后续处理和分析。
-    mt_m = np.transpose(m, [0, 2, 1]) @ m
-    focus_pt = np.linalg.inv(mt_m.mean(0)) @ (mt_m @ origins).mean(0)[:, 0]
+    coef = 2 - (directions * directions).sum(-1)
+    mt_m_mean = np.eye(3) - (directions * coef[:, None]).T @ directions / len(poses)
+    mt_m_origins = origins - directions * (coef * (directions * origins).sum(-1))[:, None]
+    focus_pt = _inv33(mt_m_mean) @ mt_m_origins.mean(0)
     return focus_pt
 
 
 def average_pose(poses: np.ndarray) -> np.ndarray:
     """New pose using average position, z-axis, and up vector of input poses."""
-    position = poses[:, :3, 3].mean(0)
-    z_axis = poses[:, :3, 2].mean(0)
-    up = poses[:, :3, 1].mean(0)
+    means = poses[:, :3, 1:4].mean(0)
+    position = means[:, 2]
+    z_axis = means[:, 1]
+    up = means[:, 0]
     cam2world = viewmatrix(z_axis, up, position)
     return cam2world
 
@@ -142,9 +264,11 @@ from typing import Tuple
 def recenter_poses(poses: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
   """Recenter poses around the origin."""
   cam2world = average_pose(poses)
-  transform = np.linalg.inv(pad_poses(cam2world))
-  poses = transform @ pad_poses(poses)
-  return unpad_poses(poses), transform
+  transform = _rigid_inv(cam2world)
+  # transform @ [R | t] = [R' R | R' t + t'], so the poses never need padding to 4x4.
+  poses = transform[:3, :3] @ poses[..., :3, :4]
+  poses[..., :3, 3] += transform[:3, 3]
+  return poses, transform
 
 
 NEAR_STRETCH = .9  # Push forward near bound for forward facing render path.
@@ -153,30 +277,25 @@ FOCUS_DISTANCE = .75  # Relative weighting of near, far bounds for render path.
 def generate_spiral_path(views, bounds,
                          n_frames: int = 180,
                          n_rots: int = 2,
-                         zrate: float = .5) -> np.ndarray:
+                         zrate: float = .5,
+                         soa=None) -> np.ndarray:
   """Calculates a forward facing spiral path for rendering."""
   # Find a reasonable 'focus depth' for this dataset as a weighted average
   # of conservative near and far bounds in disparity space.
-  poses = []
-  for view in views:
-      tmp_view = np.eye(4)
-      tmp_view[:3] = np.concatenate([view.R.T, view.T[:, None]], 1)
-      tmp_view = np.linalg.inv(tmp_view)
-      tmp_view[:, 1:3] *= -1
-      poses.append(tmp_view)
-  poses = np.stack(poses, 0)
+  poses = _views_to_poses(views, soa)
 
   print(poses.shape)
-  bounds  = bounds.repeat(poses.shape[0], 0) #np.array([[ 16.21311152, 153.86329729]])
+  # bounds: np.array([[ 16.21311152, 153.86329729]])
   scale = 1. / (bounds.min() * .75)
   poses[:, :3, 3] *= scale
-  bounds *= scale
+  bmin = bounds.min() * scale
+  bmax = bounds.max() * scale
   # Recenter poses.
   # tmp, _ = recenter_poses(poses)
   # poses[:, :3, :3] = tmp[:, :3, :3] @ np.diag(np.array([1, -1, -1]))
 
-  near_bound = bounds.min() * NEAR_STRETCH
-  far_bound = bounds.max() * FAR_STRETCH
+  near_bound = bmin * NEAR_STRETCH
+  far_bound = bmax * FAR_STRETCH
   # All cameras will point towards the world space point (0, 0, -focal).
   focal = 1 / (((1 - FOCUS_DISTANCE) / near_bound + FOCUS_DISTANCE / far_bound))
 
@@ -186,64 +305,24 @@ def generate_spiral_path(views, bounds,
   radii = np.concatenate([radii, [1.]])
 
   # Generate poses for spiral path.
-  render_poses = []
   cam2world = average_pose(poses)
   up = poses[:, :3, 1].mean(0)
-  for theta in np.linspace(0., 2. * np.pi * n_rots, n_frames, endpoint=False):
-    t = radii * [np.cos(theta), -np.sin(theta), -np.sin(theta * zrate), 1.]
-    position = cam2world @ t
-    lookat = cam2world @ [0, 0, -focal, 1.]
-    z_axis = position - lookat
-    render_pose = np.eye(4)
-    render_pose[:3] = viewmatrix(z_axis, up, position)
-    render_pose[:3, 1:3] *= -1
-    render_poses.append(np.linalg.inv(render_pose))
-  render_poses = np.stack(render_poses, axis=0)
-  return render_poses
-
-
-def render_path_spiral(views, focal=50, zrate=0.5, rots=2, N=10):
-    poses = []
-    for view in views:
-        tmp_view = np.eye(4)
-        tmp_view[:3] = np.concatenate([view.R.T, view.T[:, None]], 1)
-        tmp_view = np.linalg.inv(tmp_view)
-        tmp_view[:, 1:3] *= -1
-        poses.append(tmp_view)
-    poses = np.stack(poses, 0)
+  thetas = np.linspace(0., 2. * np.pi * n_rots, n_frames, endpoint=False)
+  return _build_render_poses(cam2world, up, radii, focal, thetas, zrate)
+
+
+def render_path_spiral(views, focal=50, zrate=0.5, rots=2, N=10, soa=None):
+    poses = _views_to_poses(views, soa)
     # poses = np.stack([np.concatenate([view.R.T, view.T[:, None]], 1) for view in views], 0)
     c2w = poses_avg(poses)
     up = normalize(poses[:, :3, 1].sum(0))
 
     # Get radii for spiral path
     rads = np.percentile(np.abs(poses[:, :3, 3]), 90, 0)
-    render_poses = []
     rads = np.array(list(rads) + [1.0])
 
-    for theta in np.linspace(0.0, 2.0 * np.pi * rots, N + 1)[:-1]:
-        c = np.dot(
-            c2w[:3, :4],
-            np.array([np.cos(theta), -np.sin(theta), -np.sin(theta * zrate), 1.0]) * rads,
-        )
-        z = normalize(c - np.dot(c2w[:3, :4], np.array([0, 0, -focal, 1.0])))
-        render_pose = np.eye(4)
-        render_pose[:3] = viewmatrix(z, up, c)
-        render_pose[:3, 1:3] *= -1
-        render_poses.append(np.linalg.inv(render_pose))
-    return render_poses
-
-
-def pad_poses(p):
-    """Pad [..., 3, 4] pose matrices with a homogeneous bottom row [0,0,0,1]."""
-    # 保证位姿所对应的4*4的变换矩阵的最后一行为[0, 0, 0, 1]，其实就是用于将非齐次坐标转为齐次坐标
-    bottom = np.broadcast_to([0, 0, 0, 1.], p[..., :1, :4].shape)
-    return np.concatenate([p[..., :3, :4], bottom], axis=-2)
-
-
-def unpad_poses(p):
-    """Remove the homogeneous bottom row from [..., 4, 4] pose matrices."""
-    # 通过对变换矩阵进行处理，将齐次坐标转为非齐次坐标
-    return p[..., :3, :4]
+    thetas = np.linspace(0.0, 2.0 * np.pi * rots, N + 1)[:-1]
+    return _build_render_poses(c2w, up, rads, focal, thetas, zrate)
 
 
 def transform_poses_pca(poses):
@@ -262,10 +341,12 @@ def transform_poses_pca(poses):
     t = t - t_mean
 
     # 计算协方差矩阵，并进行特征分解，获取最大和次大的特征向量
-    eigval, eigvec = np.linalg.eig(t.T @ t)
+    # t.T @ t 为对称半正定矩阵，eigh 直接返回实数特征值（升序）与正交特征向量
+    eigval, eigvec = np.linalg.eigh(t.T @ t)
     # Sort eigenvectors in order of largest to smallest eigenvalue.降序排列
-    inds = np.argsort(eigval)[::-1]
-    eigvec = eigvec[:, inds]
+    eigvec = eigvec[:, ::-1]
+    # 特征向量的符号由求解器决定，这里固定为每列绝对值最大的分量为正，使输出与求解器无关
+    eigvec = eigvec * np.sign(eigvec[np.abs(eigvec).argmax(0), np.arange(3)])
 
     # 通过检查旋转矩阵的行列式是否小于0，可以判断其右手性质。
     # 如果行列式小于0，则说明旋转矩阵不是右手坐标系下的旋转，而是左手坐标系下的旋转。
@@ -279,9 +360,11 @@ def transform_poses_pca(poses):
 
     # np.concatenate([rot, rot @ -t_mean[:, None]], 1), rot->transform: 3x3->3x4
     # poses_recentered = rot @ poses - rot @ t_mean = rot @ (poses - t_mean)
-    transform = np.concatenate([rot, rot @ -t_mean[:, None]], -1)
-    poses_recentered = unpad_poses(transform @ pad_poses(poses))
-    transform = np.concatenate([transform, np.eye(4)[3:]], axis=0)  # 3x4->4x4
+    transform = np.eye(4)
+    transform[:3, :3] = rot
+    transform[:3, 3] = rot @ -t_mean
+    poses_recentered = rot @ poses[:, :3, :4]
+    poses_recentered[:, :, 3] += transform[:3, 3]
 
     # Flip coordinate system if z component of y-axis is negative，如果重新中心化后的位姿中y轴的z分量为负数，则翻转坐标系。并且将这个翻转信息记录到变换矩阵中
     if poses_recentered.mean(axis=0)[2, 1] < 0:
@@ -296,23 +379,8 @@ def transform_poses_pca(poses):
 
 
 # 椭球轨迹生成
-def generate_ellipse_path(views, n_frames=600, const_speed=True, z_variation=0., z_phase=0.):
-    poses = []
-    for view in views:
-        # 相机坐标系下的旋转与平移构成的变换矩阵（即相机坐标系到世界坐标系的变换）
-        tmp_view = np.eye(4)
-        tmp_view[:3] = np.concatenate([view.R.T, view.T[:, None]], 1)
-        # 将变换矩阵转换为世界坐标系下的变换矩阵（即世界坐标系到相机坐标系的变换）
-        tmp_view = np.linalg.inv(tmp_view)
-        # 旋转矩阵描述了一个坐标系下的旋转操作，其包含了物体在空间中绕不同轴进行旋转的信息。对于给定的3x3旋转矩阵，将其第2列和第3列的数据乘以-1，会导致以下几个方面的变化：
-        # 旋转轴的方向翻转：原始的旋转矩阵描述了物体绕特定轴的旋转方向。当将第2列和第3列的数据乘以-1时，旋转轴的方向也被翻转了。这意味着物体的旋转方向将与原来的相反。
-        # 旋转角度的不变性：乘以-1后，旋转矩阵的第2列和第3列的长度和相对关系都发生了改变。然而，旋转矩阵所表示的旋转角度仍然保持不变。因此，实际的旋转角度仍然是通过计算旋转矩阵的特征值或特征向量来确定的。
-        # 物体的变形：对旋转矩阵的某些列乘以-1会导致物体在旋转过程中的变形。这是因为旋转矩阵不再描述一个纯粹的旋转，而是包含了反射、镜像等额外的变换。因此，物体可能在绕某些轴旋转时同时发生反射或镜像操作。
-        # 总的来说，将旋转矩阵的某些列乘以-1会改变旋转的方向、旋转矩阵的特征向量和特征值不变、以及可能引入额外的反射和镜像操作。这些变化将会影响物体在空间中的旋转行为和形状。
-        # 此处相当于是对相机姿态沿着光轴进行镜像翻转（可以认为是偏航角旋转180度或俯仰角旋转180度）
-        tmp_view[:, 1:3] *= -1
-        poses.append(tmp_view)
-    poses = np.stack(poses, 0)
+def generate_ellipse_path(views, n_frames=600, const_speed=True, z_variation=0., z_phase=0., soa=None):
+    poses = _views_to_poses(views, soa)
     poses, transform = transform_poses_pca(poses)
 
     # Calculate the focal point for the path (cameras point toward this).
@@ -329,15 +397,20 @@ def generate_ellipse_path(views, n_frames=600, const_speed=True, z_variation=0.,
     z_low = np.percentile((poses[:, :3, 3]), 10, axis=0)
     z_high = np.percentile((poses[:, :3, 3]), 90, axis=0)
 
+    half_range = .5 * (high - low)
+    z_half_range = .5 * (z_high - z_low)[2]
+
     def get_positions(theta):
         # Interpolate between bounds with trig functions to get ellipse in x-y.
         # Optionally also interpolate in z to change camera height along path.
-        return np.stack([
-            (low[0] + (high - low)[0] * (np.cos(theta) * .5 + .5)),
-            (low[1] + (high - low)[1] * (np.sin(theta) * .5 + .5)),
-            z_variation * (z_low[2] + (z_high - z_low)[2] *
-                           (np.cos(theta + 2 * np.pi * z_phase) * .5 + .5)),
-        ], -1)
+        positions = np.empty((theta.size, 3))
+        positions[:, 0] = low[0] + half_range[0] * (np.cos(theta) + 1)
+        positions[:, 1] = low[1] + half_range[1] * (np.sin(theta) + 1)
+        if z_variation:
+            positions[:, 2] = z_variation * (z_low[2] + z_half_range * (np.cos(theta + 2 * np.pi * z_phase) + 1))
+        else:
+            positions[:, 2] = 0
+        return positions
 
     theta = np.linspace(0, 2. * np.pi, n_frames + 1, endpoint=True)
     positions = get_positions(theta)
@@ -357,39 +430,27 @@ def generate_ellipse_path(views, n_frames=600, const_speed=True, z_variation=0.,
     ind_up = np.argmax(np.abs(avg_up))
     up = np.eye(3)[ind_up] * np.sign(avg_up[ind_up])
 
-    render_poses = []
-    for p in positions:
-        render_pose = np.eye(4)
-        render_pose[:3] = viewmatrix(p - center, up, p)
-        render_pose = np.linalg.inv(transform) @ render_pose
-        render_pose[:3, 1:3] *= -1
-        render_poses.append(np.linalg.inv(render_pose))
-    return render_poses
-
-
-def generate_spherify_path(views):
-    poses = []
-    for view in views:
-        tmp_view = np.eye(4)
-        tmp_view[:3] = np.concatenate([view.R.T, view.T[:, None]], 1)
-        tmp_view = np.linalg.inv(tmp_view)
-        tmp_view[:, 1:3] *= -1
-        poses.append(tmp_view)
-    poses = np.stack(poses, 0)
-
-    p34_to_44 = lambda p: np.concatenate(
-        [p, np.tile(np.reshape(np.eye(4)[-1, :], [1, 1, 4]), [p.shape[0], 1, 1])], 1
-    )
+    render_poses = np.tile(np.eye(4), (len(positions), 1, 1))
+    viewmatrix(positions - center, up, positions, out=render_poses[:, :3])
+    # inv(inv(transform) @ pose @ flip) = inv(pose @ flip) @ transform, and pose @ flip is rigid,
+    # so neither transform nor the composed similarity needs a general inverse.
+    render_poses[:, :3, 1:3] *= -1
+    return _rigid_inv(render_poses) @ transform
+
+
+def generate_spherify_path(views, soa=None):
+    poses = _views_to_poses(views, soa)
 
     rays_d = poses[:, :3, 2:3]
     rays_o = poses[:, :3, 3:4]
 
     def min_line_dist(rays_o, rays_d):
-        A_i = np.eye(3) - rays_d * np.transpose(rays_d, [0, 2, 1])
-        b_i = -A_i @ rays_o
-        pt_mindist = np.squeeze(
-            -np.linalg.inv((np.transpose(A_i, [0, 2, 1]) @ A_i).mean(0)) @ (b_i).mean(0)
-        )
+        # A_i = I - d d^T, so A_i^T A_i = I - (2 - |d|^2) d d^T and A_i o = o - d (d . o).
+        rays_o, rays_d = rays_o[..., 0], rays_d[..., 0]
+        coef = 2 - (rays_d * rays_d).sum(-1)
+        ata_mean = np.eye(3) - (rays_d * coef[:, None]).T @ rays_d / len(rays_d)
+        b_mean = -(rays_o - rays_d * (rays_d * rays_o).sum(-1, keepdims=True)).mean(0)
+        pt_mindist = -_inv33(ata_mean) @ b_mean
         return pt_mindist
 
     pt_mindist = min_line_dist(rays_o, rays_d)
@@ -398,12 +459,13 @@ def generate_spherify_path(views):
     up = (poses[:, :3, 3] - center).mean(0)
 
     vec0 = normalize(up)
-    vec1 = normalize(np.cross([0.1, 0.2, 0.3], vec0))
-    vec2 = normalize(np.cross(vec0, vec1))
+    vec1 = normalize(_cross([0.1, 0.2, 0.3], vec0))
+    vec2 = normalize(_cross(vec0, vec1))
     pos = center
     c2w = np.stack([vec1, vec2, vec0, pos], 1)
 
-    poses_reset = np.linalg.inv(p34_to_44(c2w[None])) @ p34_to_44(poses[:, :3, :4])
+    # poses already carry the homogeneous [0, 0, 0, 1] row
+    poses_reset = _rigid_inv(c2w) @ poses
 
     rad = np.sqrt(np.mean(np.sum(np.square(poses_reset[:, :3, 3]), -1)))
 
@@ -414,24 +476,22 @@ def generate_spherify_path(views):
     centroid = np.mean(poses_reset[:, :3, 3], 0)
     zh = centroid[2]
     radcircle = np.sqrt(rad**2 - zh**2)
-    new_poses = []
-
-    for th in np.linspace(0.0, 2.0 * np.pi, 120):
-        camorigin = np.array([radcircle * np.cos(th), radcircle * np.sin(th), zh])
-        up = np.array([0, 0, -1.0])
 
-        vec2 = normalize(camorigin)
-        vec0 = normalize(np.cross(vec2, up))
-        vec1 = normalize(np.cross(vec2, vec0))
-        pos = camorigin
-        p = np.stack([vec0, vec1, vec2, pos], 1)
-
-        render_pose = np.eye(4)
-        render_pose[:3] = p
-        #render_pose[:3, 1:3] *= -1
-        new_poses.append(render_pose)
-
-    new_poses = np.stack(new_poses, 0)
+    th = np.linspace(0.0, 2.0 * np.pi, 120)
+    camorigin = np.stack([radcircle * np.cos(th), radcircle * np.sin(th), np.full_like(th, zh)], -1)
+    up = np.array([0, 0, -1.0])
+
+    vec2 = normalize(camorigin)
+    vec0 = normalize(_cross(vec2, up))
+    vec1 = normalize(_cross(vec2, vec0))
+    pos = camorigin
+
+    new_poses = np.tile(np.eye(4), (len(th), 1, 1))
+    new_poses[:, :3, 0] = vec0
+    new_poses[:, :3, 1] = vec1
+    new_poses[:, :3, 2] = vec2
+    new_poses[:, :3, 3] = pos
+    #new_poses[:, :3, 1:3] *= -1
     return new_poses
 
 # def gaussian_poses(viewpoint_cam, mean =0, std_dev = 0.03):
@@ -475,6 +535,37 @@ def get_rotation_matrix(axis, angle):
         raise ValueError("Invalid axis. Choose from 'x', 'y', 'z'.")
 
 
+def _combined_xyz_rot(angle_x, angle_y, angle_z):
+    """
+    Closed-form Rz @ Ry @ Rx for the given angles, without building the per-axis matrices.
+    """
+    cx, sx = math.cos(angle_x), math.sin(angle_x)
+    cy, sy = math.cos(angle_y), math.sin(angle_y)
+    cz, sz = math.cos(angle_z), math.sin(angle_z)
+    return np.array([
+        [cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx],
+        [sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx],
+        [-sy, cy * sx, cy * cx]
+    ])
+
+
+def _set_world_view(viewpoint_cam, R, translate):
+    """
+    Update the camera transforms for a perturbed pose, taking the camera center from the
+    closed-form rigid inverse on the CPU and uploading it together with the view matrix.
+    """
+    world_view = getWorld2View2(R, viewpoint_cam.T, translate)
+    transforms = np.empty((5, 4), dtype=np.float32)
+    transforms[:4] = world_view.T
+    # The camera center of a world-to-view transform [R | t] is -R^T t.
+    transforms[4, :3] = -world_view[:3, :3].T @ world_view[:3, 3]
+    transforms[4, 3] = 1.0
+    transforms = torch.from_numpy(transforms).cuda()
+    viewpoint_cam.world_view_transform = transforms[:4]
+    viewpoint_cam.full_proj_transform = (viewpoint_cam.world_view_transform.unsqueeze(0).bmm(viewpoint_cam.projection_matrix.unsqueeze(0))).squeeze(0)
+    viewpoint_cam.camera_center = transforms[4, :3]
+
+
 def gaussian_poses(viewpoint_cam, mean=0, std_dev_translation=0.03, std_dev_rotation=0.01):
     # Translation Perturbation
     translate_x = np.random.normal(mean, std_dev_translation)
@@ -487,20 +578,14 @@ def gaussian_poses(viewpoint_cam, mean=0, std_dev_translation=0.03, std_dev_rota
     angle_y = np.random.normal(mean, std_dev_rotation)
     angle_z = np.random.normal(mean, std_dev_rotation)
 
-    rot_x = get_rotation_matrix('x', angle_x)
-    rot_y = get_rotation_matrix('y', angle_y)
-    rot_z = get_rotation_matrix('z', angle_z)
-
     # Combined Rotation Matrix
-    combined_rot = np.matmul(rot_z, np.matmul(rot_y, rot_x))
+    combined_rot = _combined_xyz_rot(angle_x, angle_y, angle_z)
 
     # Apply Rotation to Camera
     rotated_R = np.matmul(viewpoint_cam.R, combined_rot)
 
     # Update Camera Transformation
-    viewpoint_cam.world_view_transform = torch.tensor(getWorld2View2(rotated_R, viewpoint_cam.T, translate)).transpose(0, 1).cuda()
-    viewpoint_cam.full_proj_transform = (viewpoint_cam.world_view_transform.unsqueeze(0).bmm(viewpoint_cam.projection_matrix.unsqueeze(0))).squeeze(0)
-    viewpoint_cam.camera_center = viewpoint_cam.world_view_transform.inverse()[3, :3]
+    _set_world_view(viewpoint_cam, rotated_R, translate)
 
     return viewpoint_cam
 
@@ -510,67 +595,27 @@ def circular_poses(viewpoint_cam, radius, angle=0.0):
     translate_y = radius * np.sin(angle)
     translate_z = 0
     translate = np.array([translate_x, translate_y, translate_z])
-    viewpoint_cam.world_view_transform = torch.tensor(getWorld2View2(viewpoint_cam.R, viewpoint_cam.T, translate)).transpose(0, 1).cuda()
-    viewpoint_cam.full_proj_transform = (viewpoint_cam.world_view_transform.unsqueeze(0).bmm(viewpoint_cam.projection_matrix.unsqueeze(0))).squeeze(0)
-    viewpoint_cam.camera_center = viewpoint_cam.world_view_transform.inverse()[3, :3]
+    _set_world_view(viewpoint_cam, viewpoint_cam.R, translate)
 
     return viewpoint_cam
 
 
-def generate_spherical_sample_path(views, azimuthal_rots=1, polar_rots=0.75, N=10):
-    poses = []
-    for view in views:
-        tmp_view = np.eye(4)
-        tmp_view[:3] = np.concatenate([view.R.T, view.T[:, None]], 1)
-        tmp_view = np.linalg.inv(tmp_view)
-        tmp_view[:, 1:3] *= -1
-        poses.append(tmp_view)
-        focal = get_focal(view)
-    poses = np.stack(poses, 0)
-    # ic(min_focal, max_focal)
+def generate_spherical_sample_path(views, azimuthal_rots=1, polar_rots=0.75, N=10, soa=None):
+    poses = _views_to_poses(views, soa)
     
     c2w = poses_avg(poses)  
     up = normalize(poses[:, :3, 1].sum(0))  
     rads = np.percentile(np.abs(poses[:, :3, 3]), 90, 0)
     rads = np.array(list(rads) + [1.0])
-    ic(rads)
-    render_poses = []
     focal_range = np.linspace(0.5, 3, N **2+1)
-    index = 0
-    # Modify this loop to include phi
-    for theta in np.linspace(0.0, 2.0 * np.pi * azimuthal_rots, N + 1)[:-1]:
-        for phi in np.linspace(0.0, np.pi * polar_rots, N + 1)[:-1]:
-            # Modify these lines to use spherical coordinates for c
-            c = np.dot(
-                c2w[:3, :4],
-                rads * np.array([
-                    np.sin(phi) * np.cos(theta),
-                    np.sin(phi) * np.sin(theta),
-                    np.cos(phi),
-                    1.0
-                ])
-            )
-            
-            z = normalize(c - np.dot(c2w[:3, :4], np.array([0, 0, -focal_range[index], 1.0])))
-            render_pose = np.eye(4)
-            render_pose[:3] = viewmatrix(z, up, c)  
-            render_pose[:3, 1:3] *= -1
-            render_poses.append(np.linalg.inv(render_pose))
-            index += 1
-    return render_poses
-
-
-def generate_spiral_path(views, focal=1.5, zrate= 0, rots=1, N=600):
-    poses = []
-    focal = 0
-    for view in views:
-        tmp_view = np.eye(4)
-        tmp_view[:3] = np.concatenate([view.R.T, view.T[:, None]], 1)
-        tmp_view = np.linalg.inv(tmp_view)
-        tmp_view[:, 1:3] *= -1
-        poses.append(tmp_view)
-        focal += get_focal(views[0])
-    poses = np.stack(poses, 0)
+    thetas = np.linspace(0.0, 2.0 * np.pi * azimuthal_rots, N + 1)[:-1]
+    phis = np.linspace(0.0, np.pi * polar_rots, N + 1)[:-1]
+    return _build_sphere_poses(c2w, up, rads, focal_range, thetas, phis)
+
+
+def generate_spiral_path(views, focal=1.5, zrate= 0, rots=1, N=600, soa=None):
+    poses = _views_to_poses(views, soa)
+    focal = get_focal(views[0])
 
 
     c2w = poses_avg(poses)
@@ -578,20 +623,8 @@ def generate_spiral_path(views, focal=1.5, zrate= 0, rots=1, N=600):
 
     # Get radii for spiral path
     rads = np.percentile(np.abs(poses[:, :3, 3]), 90, 0)
-    render_poses = []
 
     rads = np.array(list(rads) + [1.0])
-    focal /= len(views)
-
-    for theta in np.linspace(0.0, 2.0 * np.pi * rots, N + 1)[:-1]:
-        c = np.dot(
-            c2w[:3, :4],
-            np.array([np.cos(theta), -np.sin(theta),-np.sin(theta * zrate), 1.0]) * rads,
-        )
-        z = normalize(c - np.dot(c2w[:3, :4], np.array([0, 0, -focal, 1.0])))
-
-        render_pose = np.eye(4)
-        render_pose[:3] = viewmatrix(z, up, c)
-        render_pose[:3, 1:3] *= -1
-        render_poses.append(np.linalg.inv(render_pose))
-    return render_poses
+
+    thetas = np.linspace(0.0, 2.0 * np.pi * rots, N + 1)[:-1]
+    return _build_render_poses(c2w, up, rads, focal, thetas, zrate)